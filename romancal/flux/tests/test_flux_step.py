@@ -1,6 +1,8 @@
 """Unit-like tests related to FluxStep"""
 
-import astropy.units as u
+import io
+
+import asdf
 import numpy as np
 import pytest
 from roman_datamodels import datamodels
@@ -8,51 +10,98 @@ from roman_datamodels import datamodels
 from romancal.datamodels import ModelLibrary
 from romancal.flux import FluxStep
 
+# Attributes scaled by FluxStep and the power of the conversion factor
+# applied to each. The variance entries are a superset; snapshots and
+# checks are filtered to the arrays the model actually carries.
+ATTR_FACTORS = [
+    ("data", 1),
+    ("err", 1),
+    ("var_rnoise", 2),
+    ("var_poisson", 2),
+    ("var_flat", 2),
+]
+
+# Same defaults as np.allclose
+RTOL = 1.0e-5
+ATOL = 1.0e-8
+
+
+def _snapshot_model(model):
+    """Capture only what test_attributes asserts on"""
+    return {
+        "conversion_megajanskys": model.meta.photometry.conversion_megajanskys,
+        **{
+            attr: getattr(model, attr).copy()
+            for attr, _ in ATTR_FACTORS
+            if hasattr(model, attr)
+        },
+    }
+
+
+def _snapshot(dataset):
+    """Snapshot the conversion scalar and scaled arrays per model
+
+    Much cheaper than deep-copying whole models just to keep their
+    pre-step values around. The conversion scalar is picked up during
+    the same borrow that captures the arrays; a metadata-only accessor
+    (library read_metadata) would only pay off for a consumer that does
+    not also need the arrays.
+    """
+    if not isinstance(dataset, ModelLibrary):
+        return {0: _snapshot_model(dataset)}
+
+    snapshot = {}
+    with dataset:
+        for i in range(len(dataset)):
+            model = dataset.borrow(i)
+            snapshot[i] = _snapshot_model(model)
+            dataset.shelve(model, i, modify=False)
+    return snapshot
 
-@pytest.mark.parametrize(
-    "attr, factor",
-    [
-        ("data", 1),
-        ("err", 1),
-        ("var_rnoise", 2),
-        ("var_poisson", 2),
-        ("var_flat", 2),
-    ],
-)
-def test_attributes(flux_step, attr, factor):
-    """Test that the attribute has been scaled by the right factor"""
+
+def test_attributes(flux_step):
+    """Test that each attribute has been scaled by the right factor"""
     original, result = flux_step
-    c_unit = 1.0
 
     # Handle difference between just a single image and a list.
-    if isinstance(original, datamodels.ImageModel):
-        original_library = ModelLibrary([original])
+    if isinstance(result, datamodels.ImageModel):
         result_library = ModelLibrary([result])
     else:
-        original_library = original
         result_library = result
 
-    assert len(original_library) == len(result_library)
-    with original_library, result_library:
-        for i in range(len(original_library)):
-            original_model = original_library.borrow(i)
-            result_model = result_library.borrow(i)
+    n_models = len(result_library)
+    assert len(original) == n_models
 
-            c_mj = original_model.meta.photometry.conversion_megajanskys
-            scale = (c_mj * c_unit) ** factor
-            original_value = getattr(original_model, attr)
-            result_value = getattr(result_model, attr)
+    # FluxStep only scales the variance arrays a model actually has, so
+    # restrict the checks to the attributes captured in the snapshots.
+    attr_factors = [af for af in ATTR_FACTORS if af[0] in original[0]]
 
-            assert np.allclose(original_value * scale, result_value)
-
-            original_library.shelve(original_model, i, modify=False)
+    # Gather the result arrays in one borrow/shelve pass per model.
+    result_stacks = {attr: [] for attr, _ in attr_factors}
+    with result_library:
+        for i in range(n_models):
+            result_model = result_library.borrow(i)
+            for attr, _ in attr_factors:
+                result_stacks[attr].append(getattr(result_model, attr))
             result_library.shelve(result_model, i, modify=False)
 
+    # Verify each attribute with one broadcasted check over the whole
+    # (n_models, ny, nx) batch instead of per-model Python iterations.
+    scales = np.array([original[i]["conversion_megajanskys"] for i in range(n_models)])
+    for attr, factor in attr_factors:
+        orig_stack = np.stack([original[i][attr] for i in range(n_models)])
+        result_stack = np.stack(result_stacks[attr])
+
+        diff = orig_stack * (scales**factor)[:, None, None]
+        diff -= result_stack
+        np.abs(diff, out=diff)
+        assert diff.max() <= ATOL + RTOL * np.abs(result_stack).max(), attr
+
 
 # ########
 # Fixtures
 # ########
-@pytest.fixture(scope="module", params=["input_imagemodel", "input_modellibrary"])
+@pytest.fixture(scope="session", params=["input_imagemodel", "input_modellibrary"])
 def flux_step(request):
     """Execute FluxStep on given input
 
@@ -62,18 +111,14 @@ def flux_step(request):
 
     Returns
     -------
-    original, result : DataModel or ModelLibrary, DataModel or ModelLibrary
+    original, result : dict, DataModel or ModelLibrary
+        Per-model snapshots of the pre-step values and the step result.
     """
     init = request.getfixturevalue(request.param)
-    if isinstance(init, ModelLibrary):
-        models = []
-        with init:
-            for m in init:
-                models.append(m.copy())
-                init.shelve(m, modify=False)
-        original = ModelLibrary(models)
-    else:
-        original = init.copy()
+
+    # Snapshot just the conversion scalar and the scaled arrays; the step
+    # operates in place, so this is all that is needed to check the result.
+    original = _snapshot(init)
 
     # Perform step
     result = FluxStep.call(init)
@@ -82,18 +127,32 @@ def flux_step(request):
     return original, result
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def image_model():
     """Product a basic ImageModel"""
-    # Create a random image and specify a conversion
-    rng = np.random.default_rng()
-    shape = (10, 10)
+    # The test asserts a scaling ratio, not statistics, so deterministic
+    # arrays built directly in float32 are enough; this skips the PRNG
+    # draws and their float64 intermediates entirely. The smallest
+    # usable shape suffices for the identity being checked.
+    shape = (2, 2)
+    n = int(np.prod(shape))
+    # Divide by a weak Python int so the ramp stays float32 under NEP 50
+    ramp = np.arange(n, dtype=np.float32).reshape(shape) / n
     image_model = datamodels.ImageModel.create_fake_data(shape=shape)
-    image_model.data = rng.poisson(2.5, size=shape).astype(np.float32)
-    image_model.var_rnoise = rng.normal(1, 0.05, size=shape).astype(np.float32)
-    image_model.var_poisson = rng.poisson(1, size=shape).astype(np.float32)
-    image_model.var_flat = rng.uniform(0, 1, size=shape).astype(np.float32)
-    image_model.meta.photometry.conversion_megajanskys = (2.0 * u.MJy / u.sr).value
+    # Serializing to the shared blob validates against the rad schemas,
+    # which pin exact array dtypes and reject attributes they don't
+    # define. Fill the arrays create_fake_data built in place so each
+    # keeps its schema dtype, and only touch variance arrays the model
+    # actually has (apply_flux_correction checks them with hasattr the
+    # same way).
+    image_model.data[...] = 2.5 + ramp
+    if hasattr(image_model, "var_rnoise"):
+        image_model.var_rnoise[...] = 1.0
+    image_model.var_poisson[...] = 0.5 + ramp
+    if not hasattr(image_model, "var_flat"):
+        image_model.var_flat = image_model.var_poisson.copy()
+    image_model.var_flat[...] = ramp
+    image_model.meta.photometry.conversion_megajanskys = 2.0  # MJy / sr
     image_model.meta.cal_step = {}
     for step_name in image_model.schema_info("required")["roman"]["meta"]["cal_step"][
         "required"
@@ -104,20 +163,47 @@ def image_model():
     return image_model
 
 
-@pytest.fixture(scope="module")
-def input_imagemodel(image_model):
+@pytest.fixture(scope="session")
+def image_model_bytes(image_model):
+    """Serialize the base ImageModel once to an in-memory ASDF blob
+
+    Rehydrating from this blob is cheaper than deep-copying the model
+    for every downstream fixture.
+    """
+    # DataModel.to_asdf only accepts paths, so write the underlying node
+    # through asdf directly to stay in memory.
+    buf = io.BytesIO()
+    asdf.AsdfFile({"roman": image_model._instance}).write_to(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="session")
+def input_imagemodel(image_model_bytes):
     """Provide a single ImageModel"""
 
-    # First just setup the basic model
-    return image_model.copy()
+    # Rehydrate a fresh model from the shared blob. This stands in for a
+    # copy-on-write model copy: the bytes are shared and FluxStep's
+    # in-place writes land on the rehydrated instance only. A shallow
+    # __dict__-sharing wrapper would not be safe here since the model
+    # tree lives behind a single shared node instance.
+    return datamodels.open(io.BytesIO(image_model_bytes))
+
+
+@pytest.fixture(scope="session")
+def input_modellibrary(image_model_bytes, tmp_path_factory):
+    """Provide a ModelLibrary backed by on-disk members"""
+    # Write both members once and build the library from the filenames;
+    # members are then lazy-opened on borrow instead of being held as
+    # deep in-memory copies for the whole session.
+    path = tmp_path_factory.mktemp("flux_library")
+    member1 = path / "image1_cal.asdf"
+    member2 = path / "image2_cal.asdf"
+
+    member1.write_bytes(image_model_bytes)
 
+    image_model2 = datamodels.open(io.BytesIO(image_model_bytes))
+    image_model2.meta.photometry.conversion_megajanskys = 0.5  # MJy / sr
+    image_model2.to_asdf(str(member2))
 
-@pytest.fixture(scope="module")
-def input_modellibrary(image_model):
-    """Provide a ModelLibrary"""
-    # Create and return a ModelLibrary
-    image_model1 = image_model.copy()
-    image_model2 = image_model.copy()
-    image_model2.meta.photometry.conversion_megajanskys = (0.5 * u.MJy / u.sr).value
-    container = ModelLibrary([image_model1, image_model2])
+    container = ModelLibrary([str(member1), str(member2)])
     return container
@@ -67,10 +67,12 @@ def mosaic_pipeline_on_skycell_asn(run_skycell_asn):
     return rtdata
 
 
-@pytest.mark.parametrize("expected_filename", EXPECTED_FILENAMES)
-def test_file_exists(run_skycell_asn, expected_filename):
+def test_files_exist(run_skycell_asn):
     """Test that the expected json files were generated"""
-    assert os.path.isfile(expected_filename)
+    # One directory scan instead of a stat call per expected file
+    present = {entry.name for entry in os.scandir(".") if entry.is_file()}
+    missing = set(EXPECTED_FILENAMES) - present
+    assert not missing, f"Missing expected association files: {sorted(missing)}"
 
 
 @pytest.mark.parametrize("expected_filename", EXPECTED_FILENAMES)